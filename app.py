@@ -1,9 +1,151 @@
+import asyncio
+import hashlib
 import os
+import queue
+import threading
+from collections import OrderedDict
 import streamlit as st
-import bibtexparser
-from bibtexparser.bwriter import BibTexWriter
-from bibtexparser.bibdatabase import BibDatabase
-from bibfixer.agent import BibFixAgent
+from bibfixer.agent import (
+    API_KEY_ENV,
+    MODELS,
+    BibFixAgent,
+    UnverifiedRevision,
+    normalize_bibtex,
+    original_entry_texts,
+)
+
+REVISION_CACHE_SIZE = 1000
+
+
+async def _revise_all(
+    agent, texts, entries, preferences, on_done, skip_complete, per_request=1
+):
+    """Revise all entries concurrently, returning results (or exceptions) in order.
+
+    With ``per_request`` > 1, that many entries are packed into each API call.
+    ``on_done(i, done, result)`` is called as each entry finishes so the UI can
+    update while the remaining requests are still in flight.
+    """
+    results = [None] * len(texts)
+    done = 0
+
+    async def _revise(indices):
+        nonlocal done
+        # The agent caps how many API calls are in flight at once
+        try:
+            if len(indices) == 1:
+                i = indices[0]
+                revised = [
+                    await agent.arevise_bibtex(
+                        texts[i],
+                        preferences,
+                        entry=entries[i],
+                        skip_complete=skip_complete,
+                    )
+                ]
+            else:
+                revised = await agent.arevise_bibtex_many(
+                    [texts[i] for i in indices],
+                    preferences,
+                    batch_size=len(indices),
+                    parsed_entries=[entries[i] for i in indices],
+                    skip_complete=skip_complete,
+                )
+        except Exception as e:
+            revised = [e] * len(indices)
+        for i, result in zip(indices, revised):
+            results[i] = result
+            done += 1
+            on_done(i, done, result)
+
+    chunks = [
+        list(range(start, min(start + per_request, len(texts))))
+        for start in range(0, len(texts), per_request)
+    ]
+    if len(chunks) > 1:
+        await agent.awarm_up()
+    await asyncio.gather(*[_revise(indices) for indices in chunks])
+    return results
+
+
+@st.cache_resource(show_spinner=False)
+def _get_event_loop():
+    """Background event loop that runs the revisions of every rerun.
+
+    The agent keeps one ``AsyncOpenAI`` client per event loop, and
+    ``asyncio.run`` would open and close a new loop on each click, dropping
+    the client's keep-alive connections with it.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def _run_on_shared_loop(make_coro, on_done):
+    """Run ``make_coro(callback)`` on the shared loop, calling ``on_done`` here.
+
+    Streamlit elements can only be updated from the script thread, so the
+    callback queues its arguments and this thread replays them.
+    """
+    updates = queue.Queue()
+    future = asyncio.run_coroutine_threadsafe(
+        make_coro(lambda *args: updates.put(args)), _get_event_loop()
+    )
+    try:
+        while not (future.done() and updates.empty()):
+            try:
+                on_done(*updates.get(timeout=0.1))
+            except queue.Empty:
+                pass
+        return future.result()
+    finally:
+        # Stop the work if the script is interrupted (e.g. a new rerun)
+        future.cancel()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_agent(api_key, model):
+    """Reuse one agent (and its pooled HTTP connections) across reruns."""
+    # The disk cache is keyed without the API key, and this agent is shared by
+    # every session; the app keeps its own per-key cache below instead
+    agent = BibFixAgent(api_key=api_key, use_cache=False)
+    agent.model = model
+    return agent
+
+
+class _RevisionCache:
+    """Thread-safe LRU of revisions shared by all reruns and sessions.
+
+    This is the app's only cross-run cache. Its agent is created with
+    ``use_cache=False`` (see ``_get_agent``), so the agent's disk cache only
+    serves the CLI and library callers.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+# st.cache_data cannot memoize the async fan-out, so keep one shared store
+@st.cache_resource(show_spinner=False)
+def _get_revision_cache():
+    return _RevisionCache(REVISION_CACHE_SIZE)
+
 
 st.set_page_config(
     page_title="BibFixer",
@@ -22,21 +164,16 @@ with st.sidebar:
         type="password",
         placeholder="Enter your OpenAI API key here",
         help="Used for OpenAI API. Not stored.",
-        value=os.getenv("OPENAI_API_KEY", ""),
+        value=os.getenv(API_KEY_ENV, ""),
     )
 
     model_friendly = st.selectbox(
         "Model",
-        options=["gpt-5-mini", "gpt-5-nano", "gpt-4.1"],
+        options=list(MODELS),
         index=0,
         help="Select the model to use. Default is gpt-5-mini.",
     )
-    model_map = {
-        "gpt-5-mini": "gpt-5-mini-2025-08-07",
-        "gpt-5-nano": "gpt-5-nano-2025-08-07",
-        "gpt-4.1": "gpt-4.1",
-    }
-    selected_model = model_map.get(model_friendly, "gpt-5-mini-2025-08-07")
+    selected_model = MODELS[model_friendly]
 
     preferences = st.text_area(
         "Formatting Preferences",
@@ -44,6 +181,31 @@ with st.sidebar:
         height=120,
     )
 
+    skip_complete = st.checkbox(
+        "Skip already-complete entries",
+        value=False,
+        help="Entries that already have title, author, year and venue (and no DOI "
+        "or URL for articles and proceedings, a DOI for other types) are kept "
+        "as-is without calling the API, unless formatting preferences are set. "
+        "Skipped entries are not verified or reformatted.",
+    )
+
+    entries_per_request = st.number_input(
+        "Entries per request",
+        min_value=1,
+        max_value=10,
+        value=1,
+        help="Pack several entries into one API call to amortize the shared "
+        "instructions. Entries that come back malformed are retried one by one.",
+    )
+
+    use_batch_api = st.checkbox(
+        "Use Batch API (cheaper, slower)",
+        value=False,
+        help="Submit all entries as one OpenAI batch job. Costs less but can take "
+        "minutes to hours and does not use web search.",
+    )
+
 
 bibtex_content = st.text_area(
     "BibTeX Content",
@@ -55,8 +217,8 @@ if st.button("Fix BibTeX", type="primary"):
     # secrets/env fallback (OpenAI only)
     effective_api_key = (
         api_key
-        or (st.secrets.get("OPENAI_API_KEY") if hasattr(st, "secrets") else None)
-        or os.getenv("OPENAI_API_KEY")
+        or (st.secrets.get(API_KEY_ENV) if hasattr(st, "secrets") else None)
+        or os.getenv(API_KEY_ENV)
     )
 
     if not effective_api_key:
@@ -64,10 +226,12 @@ if st.button("Fix BibTeX", type="primary"):
     elif not bibtex_content:
         st.error("Please enter BibTeX content.")
     else:
+        # Deferred so the page renders before the heavy dependencies load
+        import bibtexparser
+
         try:
-            agent = BibFixAgent(api_key=effective_api_key)
-            # Apply selected model to agent
-            agent.model = selected_model
+            agent = _get_agent(effective_api_key, selected_model)
+            agent.prepare(preferences)
             db = bibtexparser.loads(bibtex_content)
 
             if not db.entries:
@@ -75,26 +239,118 @@ if st.button("Fix BibTeX", type="primary"):
             else:
                 progress_bar = st.progress(0)
                 status_text = st.empty()
-                revised_entries = []
+                total = len(db.entries)
+                original_entries = original_entry_texts(bibtex_content, db.entries)
+                revised_entries = [None] * total
+                failed = []
+
+                # Identical entries (e.g. from merged .bib files) are revised once
+                groups = {}
+                for i, text in enumerate(original_entries):
+                    groups.setdefault(normalize_bibtex(text), []).append(i)
+
+                # Unchanged entries reuse the revision from the previous click,
+                # or from any earlier run with the same key and settings. The
+                # mode keeps batch (no web search) and structured results apart.
+                if use_batch_api:
+                    mode = "batch"
+                elif entries_per_request > 1:
+                    mode = "structured"
+                else:
+                    mode = "text"
+                settings = (selected_model, preferences, skip_complete, mode)
+                last_run = st.session_state.get("last_run", {})
+                shared_cache = _get_revision_cache()
+
+                def _shared_key(key):
+                    # Hashed so API keys never appear in the cache index
+                    parts = (effective_api_key, *map(str, settings), key)
+                    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
 
-                for i, entry in enumerate(db.entries):
-                    entry_id = entry.get("ID", f"entry_{i+1}")
+                this_run = {}
+                pending = []
+                reused = 0
+                for key, indices in groups.items():
+                    previous = last_run.get((settings, key)) or shared_cache.get(
+                        _shared_key(key)
+                    )
+                    if previous is None:
+                        pending.append((key, indices))
+                        continue
+                    this_run[(settings, key)] = previous
+                    for i in indices:
+                        revised_entries[i] = previous
+                    reused += len(indices)
+                if reused:
+                    st.info(
+                        f"Reused {reused} cached entr{'y' if reused == 1 else 'ies'} "
+                        "from the previous run."
+                    )
+                pending_texts = [original_entries[g[0]] for _, g in pending]
+                pending_entries = [db.entries[g[0]] for _, g in pending]
+
+                def _record(j, result):
+                    key, indices = pending[j]
+                    entry_id = db.entries[indices[0]].get("ID", f"entry_{indices[0]+1}")
+                    ok = result is not None and not isinstance(result, Exception)
+                    # Fallback answers lack web search, so they are looked up again
+                    if ok and not isinstance(result, UnverifiedRevision):
+                        this_run[(settings, key)] = result
+                        shared_cache.set(_shared_key(key), result)
+                    else:
+                        # Keep the original so one failure doesn't abort the batch;
+                        # nothing is cached, so the entry is retried next click
+                        failed.append(f"{entry_id}: {result or 'no result returned'}")
+                    for i in indices:
+                        revised_entries[i] = result if ok else original_entries[i]
+                    return entry_id
+
+                if not pending:
+                    progress_bar.progress(1.0)
+                elif use_batch_api:
                     status_text.text(
-                        f"Processing entry {i+1}/{len(db.entries)}: {entry_id}"
+                        f"Submitted {len(pending)} entries as a batch job..."
                     )
+                    with st.spinner("Waiting for the batch job to finish..."):
+                        results = agent.revise_bibtex_batch(
+                            [(text, preferences) for text in pending_texts],
+                            parsed_entries=pending_entries,
+                            skip_complete=skip_complete,
+                        )
+                    for j, result in enumerate(results):
+                        _record(j, result)
+                    progress_bar.progress(1.0)
+                else:
+                    output_placeholder = st.empty()
 
-                    single_entry_db = BibDatabase()
-                    single_entry_db.entries = [entry]
-                    writer = BibTexWriter()
-                    writer.order_entries_by = None
-                    original_entry_text = writer.write(single_entry_db)
+                    def _on_done(j, done, result):
+                        entry_id = _record(j, result)
+                        status_text.text(f"Processed {done}/{len(pending)}: {entry_id}")
+                        progress_bar.progress(done / len(pending))
+                        output_placeholder.code(
+                            "\n\n".join(r.strip() for r in revised_entries if r)
+                        )
 
-                    revised_entry_text = agent.revise_bibtex(
-                        original_entry_text, preferences
+                    _run_on_shared_loop(
+                        lambda callback: _revise_all(
+                            agent,
+                            pending_texts,
+                            pending_entries,
+                            preferences,
+                            callback,
+                            skip_complete,
+                            per_request=int(entries_per_request),
+                        ),
+                        _on_done,
                     )
-                    revised_entries.append(revised_entry_text)
-                    progress_bar.progress((i + 1) / len(db.entries))
+                    output_placeholder.empty()
+                st.session_state["last_run"] = this_run
 
+                if failed:
+                    st.warning(
+                        "Some entries could not be revised and were kept as-is:\n\n"
+                        + "\n".join(f"- {msg}" for msg in failed)
+                    )
                 status_text.text("Done!")
                 combined = "\n\n".join(revised_entries)
                 st.text_area("Revised BibTeX", combined, height=400)
@@ -1,27 +1,614 @@
+import asyncio
 import os
+import re
 import sys
-from typing import Optional, Dict, Any
+import time
+import hashlib
+import sqlite3
+import threading
+import weakref
+from typing import Optional, Dict, Any, Awaitable, Callable, Tuple, Union
 import json
-import bibtexparser
-from bibtexparser.bwriter import BibTexWriter
-from bibtexparser.bibdatabase import BibDatabase
-from openai import OpenAI
 from importlib import resources
+from pydantic import BaseModel, ValidationError
+
+API_KEY_ENV = "OPENAI_API_KEY"
+# Display name -> model id, in the order offered to users
+MODELS: Dict[str, str] = {
+    "gpt-5-mini": "gpt-5-mini-2025-08-07",
+    "gpt-5-nano": "gpt-5-nano-2025-08-07",
+    "gpt-4.1": "gpt-4.1",
+}
+DEFAULT_MODEL = MODELS["gpt-5-mini"]
+
+CACHE_DIR = os.path.expanduser("~/.cache/bibfixer")
+CACHE_FILE = "revisions.sqlite3"
+CACHE_EXPIRE = 30 * 86400  # seconds
+
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0  # seconds; doubled on every retry
+CONCURRENCY_ENV = "BIBFIXER_CONCURRENCY"
+DEFAULT_CONCURRENCY = 8
+
+_HTTP_CLIENT = None
+HTTP_MAX_CONNECTIONS = 64
+HTTP_CONNECT_TIMEOUT = 10.0  # seconds
+# Web-search revisions, multi-entry ones especially, can take minutes
+HTTP_READ_TIMEOUT = 600.0  # seconds
+
+# OpenAI clients shared by every agent using the same (api_key, base_url)
+_CLIENT_CACHE: Dict[Tuple[str, Optional[str]], Any] = {}
+
+# Attributes of BibTexEntry, in the order they are written out
+_FIELD_ORDER = (
+    "author",
+    "title",
+    "journal",
+    "booktitle",
+    "year",
+    "volume",
+    "number",
+    "pages",
+    "publisher",
+    "chapter",
+    "school",
+    "institution",
+    "note",
+)
+
+_FIELD_NAME_RE = re.compile(r"(\w+)\s*=\s*")
+_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*|\s*```\s*$")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_BIBTEX_SANITY_RE = re.compile(r"^\s*@\w+\s*\{[^,]+,")
+_ENTRY_HEADER_RE = re.compile(r"^@(\w+)\s*([{(])\s*([^,\s]*)", re.MULTILINE)
+_NON_ENTRY_TYPES = {"comment", "string", "preamble"}
+_STRING_DEF_RE = re.compile(r"^@string\s*[{(]\s*([^\s=#{}(),]+)\s*=", re.I | re.M)
+
+_TITLE_RE = re.compile(r"(?<![\w-])title\s*=\s*", re.IGNORECASE)
+_AUTHOR_RE = re.compile(r"(?<![\w-])author\s*=\s*", re.IGNORECASE)
+
+try:
+    _DEFAULT_INSTRUCTIONS: Optional[str] = (
+        resources.files("bibfixer.prompts")
+        .joinpath("default.md")
+        .read_text(encoding="utf-8")
+        .strip()
+        + "\n"
+    )
+except Exception:
+    _DEFAULT_INSTRUCTIONS = None
+
+_SINGLE_PROMPT_INTRO = (
+    "Please search the web for the academic paper described by the BibTeX entry "
+    "below and correct/complete that entry:\n\n"
+)
+_MANY_PROMPT_INTRO = (
+    "Please search the web for the academic paper described by each of the "
+    "numbered BibTeX entries below and correct/complete each entry:\n\n"
+)
+_SINGLE_OUTPUT_RULE = """
+Return ONLY the corrected BibTeX entry, properly formatted. Do not include any explanation or additional text.
+"""
+_MANY_OUTPUT_RULE = """
+Apply these instructions to each entry separately. Instead of a single BibTeX entry, return one structured item per input entry, in the same order as the input, keeping every citation key exactly as given. Leave out the fields the instructions say to omit and any that do not apply. Put any other field you keep (e.g. month, address, edition, series, howpublished, eprint, isbn) in other_fields as a name/value pair.
+"""
+# The prompt file's single-entry output section, replaced by _MANY_OUTPUT_RULE
+_OUTPUT_SECTION_RE = re.compile(
+    r"^\d+\)\s*Output requirement\b.*?(?=^\d+\)|\Z)", re.I | re.M | re.S
+)
+
+_DOI_RE = re.compile(r"^10\.\d{4,9}/")
+_REQUIRED_FIELDS = ("title", "author", "year")
+_VENUE_FIELDS = {"article": "journal", "inproceedings": "booktitle"}
+# Types whose DOI and URL the default prompt removes (see prompts/default.md §4)
+_LINK_FREE_TYPES = {"article", "inproceedings", "proceedings"}
+
+_SYSTEM_ROLE = (
+    "You are a precise academic assistant that corrects and completes BibTeX "
+    "entries. Always return valid BibTeX format."
+)
+_RESPONSES_SYSTEM_PROMPT = _SYSTEM_ROLE + "\n"
+# Without web search the chat fallback has to rely on the model's knowledge
+_CHAT_SYSTEM_PROMPT = (
+    _SYSTEM_ROLE
+    + " Use your knowledge to correct and complete the entry as best as you can.\n"
+)
+
+
+def normalize_bibtex(bibtex_string: str) -> str:
+    """Collapse whitespace and lowercase field names so equivalent entries compare equal."""
+    return " ".join(
+        _FIELD_NAME_RE.sub(lambda m: m.group(1).lower() + "=", bibtex_string).split()
+    )
+
+
+def original_entry_texts(bibtex_content: str, entries: list[Dict[str, Any]]) -> list[str]:
+    """Return the source text of each parsed entry, in the order of ``entries``.
+
+    ``bibtex_content`` is sliced at every ``@type{`` header starting a line, so
+    each entry is passed on exactly as the user wrote it. Entries that use a
+    macro defined with ``@string`` are re-serialized with BibTexWriter instead,
+    which writes the expanded values, as are entries that cannot be matched to
+    a slice by citation key.
+    """
+    names = _STRING_DEF_RE.findall(bibtex_content)
+    macros = "|".join(re.escape(name) for name in names)
+    # A bare macro name as a field value or in a ``#`` concatenation
+    uses_macro = (
+        re.compile(
+            rf"[=#]\s*(?:{macros})(?![\w:-])|(?<![\w:-])(?:{macros})\s*#", re.I
+        )
+        if names
+        else None
+    )
+    headers = list(_ENTRY_HEADER_RE.finditer(bibtex_content))
+    slices: Dict[str, list[Optional[str]]] = {}
+    for i, match in enumerate(headers):
+        if match.group(1).lower() in _NON_ENTRY_TYPES:
+            continue
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(bibtex_content)
+        text = bibtex_content[match.start() : end]
+        text = text[: text.rfind("}" if match.group(2) == "{" else ")") + 1]
+        if uses_macro is not None and uses_macro.search(text):
+            slices.setdefault(match.group(3), []).append(None)
+        else:
+            slices.setdefault(match.group(3), []).append(text + "\n")
+
+    texts = []
+    writer = None
+    for entry in entries:
+        candidates = slices.get(entry.get("ID", ""))
+        text = candidates.pop(0) if candidates else None
+        if text is not None:
+            texts.append(text)
+            continue
+        from bibtexparser.bibdatabase import BibDatabase
+
+        if writer is None:
+            from bibtexparser.bwriter import BibTexWriter
+
+            writer = BibTexWriter()
+            writer.order_entries_by = None
+        single_db = BibDatabase()
+        single_db.entries = [entry]
+        texts.append(writer.write(single_db))
+    return texts
+
+
+def _field_value(text: str, pattern: "re.Pattern[str]") -> str:
+    """Return the raw value of the first field matched by ``pattern``, or ''.
+
+    Values delimited by braces or quotes are scanned with a depth counter so
+    nested braces such as ``{Constitutional {AI}}`` are kept intact.
+    """
+    match = pattern.search(text)
+    if not match or match.end() >= len(text):
+        return ""
+    start = match.end()
+    closer = {"{": "}", '"': '"'}.get(text[start])
+    if closer is None:
+        return ""
+    depth = 0
+    for i in range(start + 1, len(text)):
+        c = text[i]
+        if c == closer and depth == 0:
+            return text[start + 1 : i]
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+    return ""
+
+
+def _first_author(authors_str: str) -> str:
+    end = authors_str.find(" and ")
+    if end < 0:
+        end = authors_str.find(",")
+    return (authors_str[:end] if end >= 0 else authors_str).strip()
+
+
+def _extract_title_author(text: str) -> Tuple[str, str]:
+    """Pull the title and first author out of a single BibTeX entry."""
+    title = " ".join(_field_value(text, _TITLE_RE).split()).strip("{}")
+    authors_str = " ".join(_field_value(text, _AUTHOR_RE).split())
+    return title, _first_author(authors_str)
+
+
+def _concurrency_from_env() -> int:
+    value = os.getenv(CONCURRENCY_ENV, str(DEFAULT_CONCURRENCY))
+    try:
+        concurrency = int(value)
+    except ValueError:
+        concurrency = 0
+    if concurrency < 1:
+        raise ValueError(
+            f"{CONCURRENCY_ENV} must be a positive integer (got {value!r})."
+        )
+    return concurrency
+
+
+def _http_options() -> Dict[str, Any]:
+    """Pool limits and timeouts shared by the sync and async HTTP clients."""
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+        ),
+        "timeout": httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    }
+
+
+def _shared_http_client():
+    """Return the process-wide HTTP client so agents reuse pooled connections."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        from openai import DefaultHttpxClient
+
+        _HTTP_CLIENT = DefaultHttpxClient(**_http_options())
+    return _HTTP_CLIENT
+
+
+def _shared_client(api_key: str):
+    """Return the cached ``OpenAI`` client for ``api_key`` and the base URL."""
+    key = (api_key, os.getenv("OPENAI_BASE_URL"))
+    client = _CLIENT_CACHE.get(key)
+    if client is None:
+        from openai import OpenAI
+
+        client = _CLIENT_CACHE[key] = OpenAI(
+            api_key=api_key, base_url=key[1], http_client=_shared_http_client()
+        )
+    return client
+
+
+def _fast_parse_header(bibtex_string: str) -> Optional[Tuple[str, str]]:
+    """Return ``(entry_type, citation_key)`` from a leading ``@type{key,`` header.
+
+    Uses plain ``str`` searches instead of a regex or a full parse; returns
+    None if the text does not start with an entry header. ``@type(key,`` is
+    accepted too.
+    """
+    text = bibtex_string.lstrip()
+    if not text.startswith("@"):
+        return None
+    openers = [i for i in (text.find("{"), text.find("(")) if i >= 0]
+    if not openers:
+        return None
+    brace = min(openers)
+    entry_type = text[1:brace].rstrip()
+    if not entry_type or not entry_type.replace("_", "").isalnum():
+        return None
+    end = text.find(",", brace)
+    key = text[brace + 1 : end if end >= 0 else len(text)].split()
+    return entry_type, key[0].rstrip("})") if key else ""
+
+
+def _entry_key(bibtex_string: str) -> str:
+    header = _fast_parse_header(bibtex_string)
+    return header[1] if header else ""
+
+
+def _is_retryable(error: Exception) -> bool:
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and (
+        error.status_code == 429 or error.status_code >= 500
+    )
+
+
+def _looks_like_bibtex(text: str) -> bool:
+    """Cheap structural check: an ``@type{key,`` header and balanced braces."""
+    if not _BIBTEX_SANITY_RE.match(text):
+        return False
+    depth = 0
+    for c in text:
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+class UnverifiedRevision(str):
+    """Revision from the chat completions fallback, made without web search.
+
+    It is returned like any other revision but never cached, so the entry is
+    looked up again on the next run.
+    """
+
+
+class _RevisionStore:
+    """Revised entries persisted in SQLite, keyed by content hash."""
+
+    def __init__(self, path: str):
+        # One connection shared by threads (e.g. Streamlit reruns), guarded by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS revisions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, ts INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM revisions WHERE ts < ?", (int(time.time()) - CACHE_EXPIRE,)
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM revisions WHERE key = ? AND ts >= ?",
+                    (key, int(time.time()) - CACHE_EXPIRE),
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: could not read from cache ({e})", file=sys.stderr)
+            return None
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO revisions (key, value, ts) VALUES (?, ?, ?)",
+                    (key, value, int(time.time())),
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: could not write to cache ({e})", file=sys.stderr)
+
+
+def _open_cache() -> Optional[_RevisionStore]:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        return _RevisionStore(os.path.join(CACHE_DIR, CACHE_FILE))
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: could not open cache at {CACHE_DIR} ({e})", file=sys.stderr)
+        return None
+
+
+class BibTexField(BaseModel):
+    """A field that has no attribute of its own on ``BibTexEntry``."""
+
+    name: str
+    value: str
+
+
+class BibTexEntry(BaseModel):
+    """One corrected entry, as returned by the structured multi-entry request."""
+
+    entry_type: str
+    citation_key: str
+    author: Optional[str] = None
+    title: Optional[str] = None
+    journal: Optional[str] = None
+    booktitle: Optional[str] = None
+    year: Optional[str] = None
+    volume: Optional[str] = None
+    number: Optional[str] = None
+    pages: Optional[str] = None
+    publisher: Optional[str] = None
+    chapter: Optional[str] = None
+    school: Optional[str] = None
+    institution: Optional[str] = None
+    note: Optional[str] = None
+    other_fields: list[BibTexField] = []
+
+
+class BibTexEntryList(BaseModel):
+    entries: list[BibTexEntry]
+
+
+def _strict_schema(schema: Any) -> Any:
+    """Adapt a pydantic JSON schema to OpenAI strict mode.
+
+    Strict mode wants every object closed and every property listed as
+    required; optional fields stay nullable through their ``anyOf``.
+    """
+    if isinstance(schema, dict):
+        schema = {k: _strict_schema(v) for k, v in schema.items() if k != "default"}
+        if schema.get("type") == "object" and "properties" in schema:
+            schema["additionalProperties"] = False
+            schema["required"] = list(schema["properties"])
+    elif isinstance(schema, list):
+        schema = [_strict_schema(v) for v in schema]
+    return schema
+
+
+_BIBTEX_TEXT_FORMAT = {
+    "format": {
+        "type": "json_schema",
+        "name": "BibTexEntryList",
+        "strict": True,
+        "schema": _strict_schema(BibTexEntryList.model_json_schema()),
+    }
+}
+
+
+def _close_json(fragment: str, max_open: int) -> Optional[str]:
+    """Close the brackets left open at the end of ``fragment``.
+
+    Returns None when the fragment stops inside a string or more than
+    ``max_open`` levels deep, i.e. in the middle of a value we cannot trust.
+    """
+    closers = []
+    in_string = escaped = False
+    for c in fragment:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            closers.append("}" if c == "{" else "]")
+        elif c in "}]" and closers:
+            closers.pop()
+    if in_string or len(closers) > max_open:
+        return None
+    fragment = fragment.rstrip().rstrip(",") + "".join(reversed(closers))
+    return _TRAILING_COMMA_RE.sub(r"\1", fragment)
+
+
+def _repair_json(text: str) -> Any:
+    """Best-effort decode of a malformed or truncated ``{"entries": [...]}`` reply.
+
+    Strips Markdown fences and trailing commas and closes the outer object
+    and list. A tail that stops inside an entry is cut back to the last
+    closed entry, so only entries that arrived complete are kept.
+    """
+    text = _FENCE_RE.sub("", text)
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("no JSON object in response")
+    text = text[start:]
+    end = len(text)
+    while end > 0:
+        candidate = _close_json(text[:end], max_open=2)
+        if candidate is not None:
+            try:
+                return json.loads(candidate)
+            except json.JSONDecodeError:
+                pass
+        end = text.rfind("}", 0, end - 1) + 1
+    raise ValueError("could not recover JSON from response")
 
 
 class BibFixAgent:
-    def __init__(self, api_key: Optional[str] = None, prompt_file: Optional[str] = None):
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        prompt_file: Optional[str] = None,
+        strict_parse: bool = False,
+        use_cache: bool = True,
+    ):
+        self.api_key = api_key or os.getenv(API_KEY_ENV)
         if not self.api_key:
             raise ValueError(
-                "OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass it as argument."
+                f"OpenAI API key is required. Set {API_KEY_ENV} environment variable or pass it as argument."
             )
 
-        self.client = OpenAI(api_key=self.api_key)
-        self.model = "gpt-5-mini-2025-08-07"
+        self.client = self._create_client()
+        self._aclients = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.concurrency = _concurrency_from_env()
+        self.model = DEFAULT_MODEL
         self.prompt_file_path = prompt_file
+        self.strict_parse = strict_parse
+        self._cached_instructions: Optional[str] = None
+        self._instructions_loaded = False
+        self._prompt_cache: Dict[str, Tuple[str, str]] = {}
+        self._many_prompt_cache: Dict[str, str] = {}
+        self._cache = _open_cache() if use_cache else None
+
+    def _create_client(self):
+        return _shared_client(self.api_key)
+
+    @property
+    def aclient(self):
+        """``AsyncOpenAI`` client bound to the running event loop.
+
+        Async connections cannot outlive the loop that opened them, so each loop
+        (e.g. each ``asyncio.run``) gets its own client.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._aclients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            # Retries are handled by _limited so they respect the concurrency cap
+            client = self._aclients[loop] = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=os.getenv("OPENAI_BASE_URL"),
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(**_http_options()),
+            )
+        return client
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit for API calls made on the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def _limited(self, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``make_call()`` under the concurrency limit.
+
+        Rate limits (429), server errors (5xx) and connection errors are retried
+        with exponential backoff, up to ``MAX_RETRIES`` times.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self._semaphore():
+                    return await make_call()
+            except Exception as e:
+                if attempt == MAX_RETRIES or not _is_retryable(e):
+                    raise
+            await asyncio.sleep(RETRY_BASE_DELAY * 2**attempt)
+
+    def revise_bibtex_concurrently(
+        self,
+        bibtex_list: list[str],
+        user_preferences: str = "",
+        entries: Optional[list[Dict[str, Any]]] = None,
+        on_done: Optional[Callable[[int, Union[str, Exception]], None]] = None,
+    ) -> list[Union[str, Exception]]:
+        """Revise all of ``bibtex_list`` concurrently and return results in order.
+
+        A synchronous façade over :meth:`arevise_bibtex`; at most
+        ``self.concurrency`` requests are in flight at once. As with
+        ``asyncio.gather(return_exceptions=True)``, an entry that fails has its
+        exception in place of the revised text. ``on_done(i, result)`` is
+        called as each entry finishes, in completion order.
+        """
+
+        async def _revise(i: int, bibtex_string: str) -> Union[str, Exception]:
+            try:
+                result: Union[str, Exception] = await self.arevise_bibtex(
+                    bibtex_string, user_preferences, entry=self._parsed_at(entries, i)
+                )
+            except Exception as e:
+                result = e
+            if on_done is not None:
+                on_done(i, result)
+            return result
+
+        async def _gather_all():
+            return await asyncio.gather(
+                *[_revise(i, text) for i, text in enumerate(bibtex_list)]
+            )
+
+        return asyncio.run(_gather_all())
+
+    async def awarm_up(self) -> None:
+        """Open a connection for the running loop's client ahead of real requests.
+
+        A cheap ``models.list`` call pays DNS and the TLS handshake up front, so
+        the first revision requests can reuse the pooled connection.
+        """
+        try:
+            await self.aclient.models.list()
+        except Exception as e:
+            print(f"Note: warm-up request failed ({str(e)})", file=sys.stderr)
 
     def _load_instructions_from_file(self) -> Optional[str]:
+        if self._instructions_loaded:
+            return self._cached_instructions
+        self._cached_instructions = self._read_instructions()
+        self._instructions_loaded = True
+        return self._cached_instructions
+
+    def _read_instructions(self) -> Optional[str]:
         if self.prompt_file_path:
             try:
                 if os.path.exists(self.prompt_file_path):
@@ -29,31 +616,18 @@ class BibFixAgent:
                         return f.read().strip() + "\n"
             except Exception:
                 pass
-        try:
-            with resources.files("bibfixer.prompts").joinpath("default.md").open(
-                "r", encoding="utf-8"
-            ) as f:
-                return f.read().strip() + "\n"
-        except Exception:
-            return None
+        return _DEFAULT_INSTRUCTIONS
 
     def parse_bibtex(self, bibtex_string: str) -> Dict[str, Any]:
+        import bibtexparser
+
         try:
             bib_database = bibtexparser.loads(bibtex_string)
             if not bib_database.entries:
                 raise ValueError("No valid BibTeX entries found")
             entry = bib_database.entries[0]
             title = entry.get("title", "").strip("{}")
-            authors_str = entry.get("author", "")
-            if authors_str:
-                if " and " in authors_str:
-                    first_author = authors_str.split(" and ")[0].strip()
-                elif "," in authors_str:
-                    first_author = authors_str.split(",")[0].strip()
-                else:
-                    first_author = authors_str.strip()
-            else:
-                first_author = ""
+            first_author = _first_author(entry.get("author", ""))
             return {
                 "original_entry": entry,
                 "title": title,
@@ -63,105 +637,547 @@ class BibFixAgent:
         except Exception as e:
             raise ValueError(f"Failed to parse BibTeX: {str(e)}")
 
-    def revise_bibtex(self, bibtex_string: str, user_preferences: str = "") -> str:
-        parsed = self.parse_bibtex(bibtex_string)
-        prompt = self._create_prompt(bibtex_string, parsed, user_preferences)
-        try:
-            full_prompt = (
-                """You are a precise academic assistant that corrects and completes BibTeX entries. Always return valid BibTeX format.
+    def _describe_entry(
+        self, bibtex_string: str, entry: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Collect the fields needed for the prompt without a full parse.
 
-"""
-                + prompt
-            )
-            response = self.client.responses.create(
-                model=self.model, input=full_prompt, tools=[{"type": "web_search"}]
-            )
-            revised_bibtex = None
-            if hasattr(response, "output_text"):
-                revised_bibtex = getattr(response, "output_text", None)
-            elif hasattr(response, "__iter__"):
-                for item in response:
-                    if hasattr(item, "type") and item.type == "message":
-                        if hasattr(item, "content") and item.content:
-                            for content_item in item.content:
-                                if hasattr(content_item, "text"):
-                                    revised_bibtex = content_item.text
-                                    break
-                        break
-            elif hasattr(response, "output"):
-                revised_bibtex = response.output
-            else:
-                revised_bibtex = str(response)
-            if not revised_bibtex:
-                raise ValueError("Could not extract BibTeX from response")
-            try:
-                bibtexparser.loads(revised_bibtex)
-            except Exception:
-                print(
-                    "Warning: Response may not be valid BibTeX format", file=sys.stderr
+        With ``strict_parse=True`` the entry is always re-parsed with
+        :meth:`parse_bibtex`. Otherwise ``entry``, a dict already produced by
+        bibtexparser (e.g. when the caller parsed the whole file), is used if
+        given, and the fields are pulled from ``bibtex_string`` with a quick
+        scan if not.
+        """
+        if self.strict_parse:
+            return self.parse_bibtex(bibtex_string)
+        if entry is not None:
+            return {
+                "original_entry": entry,
+                "title": entry.get("title", "").strip("{}"),
+                "first_author": _first_author(entry.get("author", "")),
+                "entry_type": entry.get("ENTRYTYPE", "article"),
+            }
+        header = _fast_parse_header(bibtex_string)
+        if not header:
+            raise ValueError("Failed to parse BibTeX: No valid BibTeX entries found")
+        title, first_author = _extract_title_author(bibtex_string)
+        return {
+            "original_entry": None,
+            "title": title,
+            "first_author": first_author,
+            "entry_type": header[0].lower(),
+        }
+
+    def _is_complete(self, entry: Dict[str, Any]) -> bool:
+        """Return True if ``entry`` already has its core fields.
+
+        Articles and proceedings must also be free of the DOI and URL that the
+        default prompt removes, so only entries already in that form are
+        skipped; other types need a valid DOI instead.
+        """
+        entry_type = entry.get("ENTRYTYPE", "").lower()
+        fields = list(_REQUIRED_FIELDS)
+        venue = _VENUE_FIELDS.get(entry_type)
+        if venue:
+            fields.append(venue)
+        if not all(str(entry.get(f, "")).strip() for f in fields):
+            return False
+        if entry_type in _LINK_FREE_TYPES:
+            return not any(str(entry.get(f, "")).strip() for f in ("doi", "url"))
+        return bool(_DOI_RE.match(str(entry.get("doi", "")).strip()))
+
+    def _can_skip(self, entry: Optional[Dict[str, Any]], preferences: str) -> bool:
+        return not preferences and entry is not None and self._is_complete(entry)
+
+    def _cache_key(self, bibtex_string: str, preferences: str, mode: str) -> str:
+        parts = (
+            mode,
+            normalize_bibtex(bibtex_string),
+            preferences,
+            self.model,
+            self._load_instructions_from_file() or "",
+        )
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _cache_lookup(self, bibtex_string: str, preferences: str, mode: str = "text"):
+        """Return ``(key, cached_revision)``; both are None without a cache.
+
+        ``mode`` is ``"text"`` for revisions written by the model itself and
+        ``"structured"`` for those rebuilt from a multi-entry reply, which are
+        kept apart so single-entry callers never get the structured form back.
+        """
+        if self._cache is None:
+            return None, None
+        key = self._cache_key(bibtex_string, preferences, mode)
+        return key, self._cache.get(key)
+
+    def _cache_store(
+        self, bibtex_string: str, preferences: str, revised: str, mode: str = "text"
+    ) -> None:
+        if self._cache is not None:
+            self._cache.set(self._cache_key(bibtex_string, preferences, mode), revised)
+
+    def revise_bibtex(
+        self,
+        bibtex_string: str,
+        user_preferences: str = "",
+        entry: Optional[Dict[str, Any]] = None,
+        skip_complete: bool = False,
+    ) -> str:
+        """Return a corrected version of ``bibtex_string``.
+
+        ``entry`` is the entry as already parsed by bibtexparser, if available.
+        With ``skip_complete``, an entry that already looks complete (see
+        :meth:`_is_complete`) is returned unchanged without calling the API,
+        unless formatting preferences are given.
+        """
+        if skip_complete and self._can_skip(entry, user_preferences):
+            return bibtex_string
+        key, cached = self._cache_lookup(bibtex_string, user_preferences)
+        if cached is not None:
+            return cached
+        revised_bibtex = self._request_revision(bibtex_string, user_preferences, entry)
+        if key is not None and not isinstance(revised_bibtex, UnverifiedRevision):
+            self._cache.set(key, revised_bibtex)
+        return revised_bibtex
+
+    async def arevise_bibtex(
+        self,
+        bibtex_string: str,
+        user_preferences: str = "",
+        entry: Optional[Dict[str, Any]] = None,
+        skip_complete: bool = False,
+    ) -> str:
+        """Async variant of :meth:`revise_bibtex` using the ``AsyncOpenAI`` client."""
+        if skip_complete and self._can_skip(entry, user_preferences):
+            return bibtex_string
+        key, cached = self._cache_lookup(bibtex_string, user_preferences)
+        if cached is not None:
+            return cached
+        revised_bibtex = await self._arequest_revision(
+            bibtex_string, user_preferences, entry
+        )
+        if key is not None and not isinstance(revised_bibtex, UnverifiedRevision):
+            self._cache.set(key, revised_bibtex)
+        return revised_bibtex
+
+    def _request_revision(
+        self,
+        bibtex_string: str,
+        user_preferences: str,
+        entry: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Synchronous façade over :meth:`_arequest_revision`."""
+        return asyncio.run(
+            self._arequest_revision(bibtex_string, user_preferences, entry)
+        )
+
+    async def _arequest_revision(
+        self,
+        bibtex_string: str,
+        user_preferences: str,
+        entry: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        parsed = self._describe_entry(bibtex_string, entry)
+        system_msg, instructions = self.prepare(user_preferences)
+        prompt = self._create_prompt(bibtex_string, parsed)
+        try:
+            response = await self._limited(
+                lambda: self.aclient.responses.create(
+                    model=self.model,
+                    instructions=instructions,
+                    input=prompt,
+                    tools=[{"type": "web_search"}],
                 )
-            return revised_bibtex
+            )
+            return self._check_revision(self._extract_response_text(response))
         except Exception as e:
-            try:
-                print(
-                    f"Note: Responses API failed ({str(e)}), falling back to chat completions API without web search",
-                    file=sys.stderr,
-                )
-                response = self.client.chat.completions.create(
+
+            async def _stream_chat() -> str:
+                stream = await self.aclient.chat.completions.create(
                     model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a precise academic assistant that corrects and completes BibTeX entries. Always return valid BibTeX format. Use your knowledge to correct and complete the entry as best as you can.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
+                    messages=self._chat_messages(system_msg, prompt),
+                    stream=True,
+                )
+                buf: list[str] = []
+                async for chunk in stream:
+                    self._append_delta(buf, chunk)
+                return self._join_stream(buf)
+
+            try:
+                self._note_fallback(e)
+                return UnverifiedRevision(
+                    self._check_revision(await self._limited(_stream_chat))
                 )
-                revised_bibtex = response.choices[0].message.content
-                try:
-                    bibtexparser.loads(revised_bibtex)
-                except Exception:
-                    print(
-                        "Warning: Response may not be valid BibTeX format",
-                        file=sys.stderr,
-                    )
-                return revised_bibtex
             except Exception as e2:
                 raise RuntimeError(
                     f"Failed to call OpenAI API: {str(e)} | Fallback also failed: {str(e2)}"
                 )
 
-    def _create_prompt(
-        self, original_bibtex: str, parsed: Dict[str, Any], preferences: str
-    ) -> str:
-        title = parsed["title"]
-        first_author = parsed["first_author"]
-        prompt = f"""Please search the web for the following academic paper and correct/complete its BibTeX entry:
+    def _extract_response_text(self, response: Any) -> str:
+        revised_bibtex = None
+        if hasattr(response, "output_text"):
+            revised_bibtex = getattr(response, "output_text", None)
+        elif hasattr(response, "__iter__"):
+            for item in response:
+                if hasattr(item, "type") and item.type == "message":
+                    if hasattr(item, "content") and item.content:
+                        for content_item in item.content:
+                            if hasattr(content_item, "text"):
+                                revised_bibtex = content_item.text
+                                break
+                    break
+        elif hasattr(response, "output"):
+            revised_bibtex = response.output
+        else:
+            revised_bibtex = str(response)
+        if not revised_bibtex:
+            raise ValueError("Could not extract BibTeX from response")
+        return revised_bibtex
 
-Title: "{title}"
-First Author: {first_author if first_author else "(unknown)"}
+    def _append_delta(self, buf: list[str], chunk: Any) -> None:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            buf.append(delta)
 
-Original BibTeX entry:
-```bibtex
-{original_bibtex}
-```
-"""
+    def _join_stream(self, buf: list[str]) -> str:
+        revised_bibtex = "".join(buf)
+        if not revised_bibtex:
+            raise ValueError("Could not extract BibTeX from response")
+        return revised_bibtex
+
+    def _check_revision(self, revised_bibtex: str) -> str:
+        if not _looks_like_bibtex(revised_bibtex):
+            print(
+                "Warning: Response may not be valid BibTeX format "
+                "(missing entry header, extra text or unbalanced braces)",
+                file=sys.stderr,
+            )
+        return revised_bibtex
+
+    def _note_fallback(self, error: Exception) -> None:
+        print(
+            f"Note: Responses API failed ({str(error)}), falling back to chat completions API without web search",
+            file=sys.stderr,
+        )
+
+    def revise_bibtex_many(
+        self,
+        entries: list[str],
+        preferences: str = "",
+        batch_size: int = 8,
+        parsed_entries: Optional[list[Dict[str, Any]]] = None,
+        skip_complete: bool = False,
+    ) -> list[Union[str, Exception]]:
+        """Revise ``entries`` with up to ``batch_size`` of them in each request.
+
+        Sharing one request amortizes the instructions and round trip over
+        several entries. The model returns a structured ``BibTexEntryList``
+        that is matched back to the inputs by citation key; entries that are
+        missing from the reply, or whose request fails, are revised one by one
+        with :meth:`revise_bibtex`, concurrently. As in
+        :meth:`revise_bibtex_concurrently`, an entry whose revision fails has
+        its exception in place of the revised text. ``parsed_entries`` and
+        ``skip_complete`` have the same meaning as ``entry`` and
+        ``skip_complete`` there. A synchronous façade over
+        :meth:`arevise_bibtex_many`.
+        """
+        return asyncio.run(
+            self.arevise_bibtex_many(
+                entries, preferences, batch_size, parsed_entries, skip_complete
+            )
+        )
+
+    async def arevise_bibtex_many(
+        self,
+        entries: list[str],
+        preferences: str = "",
+        batch_size: int = 8,
+        parsed_entries: Optional[list[Dict[str, Any]]] = None,
+        skip_complete: bool = False,
+    ) -> list[Union[str, Exception]]:
+        """Async variant of :meth:`revise_bibtex_many`."""
+        revised, pending = self._many_pending(
+            entries, preferences, parsed_entries, skip_complete
+        )
+        for start in range(0, len(pending), batch_size):
+            indices = pending[start : start + batch_size]
+            texts = [entries[i] for i in indices]
+            by_key: Dict[str, str] = {}
+            if len(texts) > 1:
+                try:
+                    response = await self._limited(
+                        lambda: self.aclient.responses.create(
+                            **self._many_request(texts, preferences)
+                        )
+                    )
+                    by_key = self._structured_by_key(response)
+                except Exception as e:
+                    self._note_many_failed(e)
+            fallback = []
+            for i in indices:
+                structured = by_key.get(_entry_key(entries[i]))
+                if structured is not None:
+                    revised[i] = structured
+                    self._cache_store(entries[i], preferences, structured, "structured")
+                else:
+                    fallback.append(i)
+            results = await asyncio.gather(
+                *[
+                    self.arevise_bibtex(
+                        entries[i], preferences, entry=self._parsed_at(parsed_entries, i)
+                    )
+                    for i in fallback
+                ],
+                return_exceptions=True,
+            )
+            for i, result in zip(fallback, results):
+                revised[i] = result
+        return revised
+
+    def _parsed_at(
+        self, parsed_entries: Optional[list[Dict[str, Any]]], i: int
+    ) -> Optional[Dict[str, Any]]:
+        return parsed_entries[i] if parsed_entries is not None else None
+
+    def _many_pending(
+        self,
+        entries: list[str],
+        preferences: str,
+        parsed_entries: Optional[list[Dict[str, Any]]],
+        skip_complete: bool,
+    ) -> Tuple[list[Any], list[int]]:
+        """Resolve skipped and cached entries; return results and pending indices."""
+        revised: list[Any] = [None] * len(entries)
+        pending = []
+        for i, bibtex_string in enumerate(entries):
+            entry = self._parsed_at(parsed_entries, i)
+            if skip_complete and self._can_skip(entry, preferences):
+                revised[i] = bibtex_string
+                continue
+            # A full single-entry revision is as good as a structured one here
+            _, cached = self._cache_lookup(bibtex_string, preferences, "structured")
+            if cached is None:
+                _, cached = self._cache_lookup(bibtex_string, preferences)
+            if cached is not None:
+                revised[i] = cached
+            else:
+                pending.append(i)
+        return revised, pending
+
+    def _many_prompt(self, texts: list[str]) -> str:
+        parts = [_MANY_PROMPT_INTRO]
+        for n, text in enumerate(texts, start=1):
+            parts.append(f"[{n}]\n```bibtex\n{text.strip()}\n```\n")
+        return "".join(parts)
+
+    def _many_request(self, texts: list[str], preferences: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "instructions": self._many_instructions(preferences),
+            "input": self._many_prompt(texts),
+            "tools": [{"type": "web_search"}],
+            "text": _BIBTEX_TEXT_FORMAT,
+        }
+
+    def _structured_by_key(self, response: Any) -> Dict[str, str]:
+        text = self._extract_response_text(response)
+        try:
+            entries = BibTexEntryList.model_validate(json.loads(text)).entries
+        except (json.JSONDecodeError, ValidationError) as e:
+            entries = self._recover_entries(text)
+            print(
+                f"Note: recovered {len(entries)} entr{'y' if len(entries) == 1 else 'ies'} "
+                f"from a malformed structured reply ({type(e).__name__})",
+                file=sys.stderr,
+            )
+        return {
+            entry.citation_key: self._structured_entry_to_bibtex(entry)
+            for entry in entries
+        }
+
+    def _recover_entries(self, text: str) -> list[BibTexEntry]:
+        """Salvage the valid entries of a reply that failed to decode or validate.
+
+        Entries are validated one by one, so a single bad item does not discard
+        the rest; inputs left without a result are revised individually.
+        """
+        data = _repair_json(text)
+        items = data.get("entries") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            raise ValueError("structured reply has no entries list")
+        entries = []
+        for item in items:
+            try:
+                entries.append(BibTexEntry.model_validate(item))
+            except ValidationError:
+                continue
+        return entries
+
+    def _structured_entry_to_bibtex(self, entry: BibTexEntry) -> str:
+        parts = [f"@{entry.entry_type}{{{entry.citation_key}"]
+        for field in _FIELD_ORDER:
+            value = getattr(entry, field)
+            if value and value.strip():
+                parts.append(f"  {field} = {{{value.strip()}}}")
+        seen = set(_FIELD_ORDER)
+        for extra in entry.other_fields:
+            name = extra.name.strip().lower()
+            if name.isidentifier() and name not in seen and extra.value.strip():
+                seen.add(name)
+                parts.append(f"  {name} = {{{extra.value.strip()}}}")
+        return ",\n".join(parts) + "\n}"
+
+    def _note_many_failed(self, error: Exception) -> None:
+        print(
+            f"Note: combined request failed ({str(error)}), revising entries individually",
+            file=sys.stderr,
+        )
+
+    def revise_bibtex_batch(
+        self,
+        entries: list[tuple[str, str]],
+        poll_interval: float = 10.0,
+        parsed_entries: Optional[list[Dict[str, Any]]] = None,
+        skip_complete: bool = False,
+    ) -> list[Union[str, Exception]]:
+        """Revise many entries through the OpenAI Batch API.
+
+        Each item of ``entries`` is a ``(bibtex_string, user_preferences)`` pair.
+        Batch jobs cost less than synchronous calls but may take minutes (up to
+        24h) to finish and do not use web search. Results are returned in input
+        order; an entry the batch returned no result for has a ``RuntimeError``
+        in place of its revised text, as in :meth:`revise_bibtex_concurrently`.
+        ``parsed_entries`` and ``skip_complete`` are as in
+        :meth:`revise_bibtex_many`; skipped entries are not submitted.
+        """
+        revised_entries: list[Union[str, Exception, None]] = [None] * len(entries)
+        lines = []
+        for i, (bibtex_string, preferences) in enumerate(entries):
+            entry = self._parsed_at(parsed_entries, i)
+            if skip_complete and self._can_skip(entry, preferences):
+                revised_entries[i] = bibtex_string
+                continue
+            parsed = self._describe_entry(bibtex_string, entry)
+            system_msg, _ = self.prepare(preferences)
+            prompt = self._create_prompt(bibtex_string, parsed)
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": f"entry_{i}",
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": self.model,
+                            "messages": self._chat_messages(system_msg, prompt),
+                        },
+                    }
+                )
+            )
+        if not lines:
+            return revised_entries
+        batch_file = self.client.files.create(
+            file=("bibfixer_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch.id} finished with status '{batch.status}'")
+
+        results: Dict[str, str] = {}
+        if batch.output_file_id:
+            output = self.client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    body = response["body"]
+                    results[record["custom_id"]] = body["choices"][0]["message"][
+                        "content"
+                    ]
+
+        for i in range(len(entries)):
+            if revised_entries[i] is not None:
+                continue
+            revised_bibtex = results.get(f"entry_{i}")
+            revised_entries[i] = revised_bibtex or RuntimeError(
+                f"batch {batch.id} returned no result for this entry"
+            )
+        return revised_entries
+
+    def prepare(self, preferences: str = "") -> Tuple[str, str]:
+        """Return the ``(system_message, instructions)`` pair for ``preferences``.
+
+        ``system_message`` (chat completions) and ``instructions`` (Responses
+        API) hold everything that is identical across entries: the role, the
+        prompt file, the preferences and the output rule. The per-entry user
+        message then comes last, so providers can reuse the cached prompt
+        prefix. Both are built once per preferences string.
+        """
+        cached = self._prompt_cache.get(preferences)
+        if cached is None:
+            shared = self._instructions_block(preferences) + _SINGLE_OUTPUT_RULE
+            cached = self._prompt_cache[preferences] = (
+                _CHAT_SYSTEM_PROMPT + shared,
+                _RESPONSES_SYSTEM_PROMPT + shared,
+            )
+        return cached
+
+    def _many_instructions(self, preferences: str) -> str:
+        instructions = self._many_prompt_cache.get(preferences)
+        if instructions is None:
+            instructions = (
+                _RESPONSES_SYSTEM_PROMPT
+                + self._instructions_block(preferences, many=True)
+                + _MANY_OUTPUT_RULE
+            )
+            self._many_prompt_cache[preferences] = instructions
+        return instructions
+
+    def _instructions_block(self, preferences: str, many: bool = False) -> str:
+        block = ""
         external_instructions = self._load_instructions_from_file()
+        if external_instructions and many:
+            external_instructions = (
+                _OUTPUT_SECTION_RE.sub("", external_instructions).rstrip() + "\n"
+            )
         if external_instructions:
-            prompt += "\n" + external_instructions
+            block += "\n" + external_instructions
         else:
             print(
                 "Warning: prompt file not found or unreadable; proceeding without detailed instructions.",
                 file=sys.stderr,
             )
         if preferences:
-            prompt += f"""
+            block += f"""
 5. Apply these user preferences to the formatting:
 {preferences}
 """
-        prompt += """
-Return ONLY the corrected BibTeX entry, properly formatted. Do not include any explanation or additional text.
-"""
-        return prompt
+        return block
 
+    def _chat_messages(self, system_msg: str, prompt: str) -> list[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": prompt},
+        ]
 
+    def _create_prompt(self, original_bibtex: str, parsed: Dict[str, Any]) -> str:
+        hint = ""
+        if not parsed["title"] and parsed["first_author"]:
+            hint = f'Hint: the title is missing; the first author is {parsed["first_author"]}.\n\n'
+        return "".join(
+            (
+                _SINGLE_PROMPT_INTRO,
+                hint,
+                f"Original BibTeX entry:\n```bibtex\n{original_bibtex}\n```\n",
+            )
+        )
@@ -1,10 +1,6 @@
 import sys
-from typing import Dict, Any
 import argparse
-import bibtexparser
-from bibtexparser.bwriter import BibTexWriter
-from bibtexparser.bibdatabase import BibDatabase
-from .agent import BibFixAgent
+from .agent import BibFixAgent, original_entry_texts
 
 
 def main() -> None:
@@ -26,6 +22,17 @@ def main() -> None:
         default=None,
         help="Path to instruction prompt (default: bundled prompts/default.md)",
     )
+    parser.add_argument(
+        "--strict-parse",
+        action="store_true",
+        help="Re-parse each entry on its own with bibtexparser before prompting",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Do not read or write the on-disk cache in ~/.cache/bibfixer",
+    )
     parser.add_argument("-o", "--output", help="Output file (default: print to stdout)")
     parser.add_argument(
         "--api-key", help="OpenAI API key (or set OPENAI_API_KEY env var)"
@@ -48,11 +55,19 @@ def main() -> None:
         sys.exit(1)
 
     try:
-        agent = BibFixAgent(api_key=args.api_key, prompt_file=args.prompt_file)
+        agent = BibFixAgent(
+            api_key=args.api_key,
+            prompt_file=args.prompt_file,
+            strict_parse=args.strict_parse,
+            use_cache=args.use_cache,
+        )
     except ValueError as e:
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
+    # Deferred so --help and argument errors return without loading the parser
+    import bibtexparser
+
     try:
         db = bibtexparser.loads(bibtex_content)
         entries = db.entries or []
@@ -63,40 +78,43 @@ def main() -> None:
         print(f"Error parsing BibTeX: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
-    def _dump_single_entry(entry_dict: Dict[str, Any]) -> str:
-        single_db = BibDatabase()
-        single_db.entries = [entry_dict]
-        writer = BibTexWriter()
-        writer.order_entries_by = None
-        return writer.write(single_db)
+    original_texts = original_entry_texts(bibtex_content, entries)
 
-    revised_entries_text: list[str] = []
-    print(
-        f"Found {len(entries)} entr{'y' if len(entries)==1 else 'ies'}; processing sequentially...",
-        file=sys.stderr,
-    )
-    for idx, entry in enumerate(entries, start=1):
-        key = entry.get("ID", f"entry_{idx}")
-        print(f"Revising {idx}/{len(entries)}: {key}", file=sys.stderr)
-        original_entry_text = _dump_single_entry(entry)
+    revised_entries_text: list[str] = [""] * len(entries)
+    done = 0
+
+    def _report(i: int, result) -> None:
+        # Called as each entry finishes, so output appears while others run
+        nonlocal done
+        done += 1
+        key = entries[i].get("ID", f"entry_{i + 1}")
+        print(f"Revised {done}/{len(entries)}: {key}", file=sys.stderr)
+        original_entry_text = original_texts[i]
         separator = "=" * 80
         print(separator)
         print("--- BEFORE ---")
         print(original_entry_text.strip())
-        try:
-            revised_text = agent.revise_bibtex(original_entry_text, args.preferences)
-            revised_entries_text.append(revised_text.strip())
-            final_text = revised_text
-        except Exception as e:
+        if isinstance(result, Exception):
             print(
-                f"Error revising entry '{key}': {str(e)} — keeping original",
+                f"Error revising entry '{key}': {str(result)} — keeping original",
                 file=sys.stderr,
             )
-            revised_entries_text.append(original_entry_text.strip())
             final_text = original_entry_text
+        else:
+            final_text = result
+        revised_entries_text[i] = final_text.strip()
         print("--- AFTER ----")
         print(final_text.strip())
-        print(separator)
+        print(separator, flush=True)
+
+    print(
+        f"Found {len(entries)} entr{'y' if len(entries)==1 else 'ies'}; "
+        f"processing up to {agent.concurrency} at a time...",
+        file=sys.stderr,
+    )
+    agent.revise_bibtex_concurrently(
+        original_texts, args.preferences, entries=entries, on_done=_report
+    )
 
     combined = "\n\n".join(revised_entries_text) + "\n"
 
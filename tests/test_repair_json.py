@@ -0,0 +1,72 @@
+import json
+import types
+import unittest
+
+from bibfixer.agent import BibFixAgent, _repair_json
+
+ENTRY_A = '{"entry_type": "article", "citation_key": "a"}'
+ENTRY_B = '{"entry_type": "book", "citation_key": "b"}'
+
+
+def _keys(data):
+    return [item["citation_key"] for item in data["entries"]]
+
+
+class RepairJsonTest(unittest.TestCase):
+    def test_valid_reply_is_unchanged(self):
+        text = '{"entries": [%s, %s]}' % (ENTRY_A, ENTRY_B)
+        self.assertEqual(_repair_json(text), json.loads(text))
+
+    def test_strips_markdown_fences(self):
+        data = _repair_json('```json\n{"entries": [%s]}\n```' % ENTRY_A)
+        self.assertEqual(_keys(data), ["a"])
+
+    def test_drops_trailing_commas(self):
+        data = _repair_json('{"entries": [%s, %s,],}' % (ENTRY_A, ENTRY_B))
+        self.assertEqual(_keys(data), ["a", "b"])
+
+    def test_closes_truncated_array(self):
+        data = _repair_json('{"entries": [%s, %s' % (ENTRY_A, ENTRY_B))
+        self.assertEqual(_keys(data), ["a", "b"])
+        self.assertEqual(_keys(_repair_json('{"entries": [%s,' % ENTRY_A)), ["a"])
+
+    def test_cuts_back_unterminated_string(self):
+        text = '{"entries": [%s, {"entry_type": "book", "title": "Trunc' % ENTRY_A
+        self.assertEqual(_keys(_repair_json(text)), ["a"])
+
+    def test_cuts_back_entry_missing_its_closing_brace(self):
+        # The last entry may have been cut off before its remaining fields
+        text = '{"entries": [%s, {"entry_type": "book", "citation_key": "b"' % ENTRY_A
+        self.assertEqual(_keys(_repair_json(text)), ["a"])
+
+    def test_braces_inside_strings_are_ignored(self):
+        text = (
+            '{"entries": [{"entry_type": "misc", "citation_key": "c", '
+            '"title": "A {B}} \\" }"}'
+        )
+        data = _repair_json(text)
+        self.assertEqual(data["entries"][0]["title"], 'A {B}} " }')
+
+    def test_unrecoverable_reply_raises(self):
+        with self.assertRaises(ValueError):
+            _repair_json("Sorry, I could not find these papers.")
+        with self.assertRaises(ValueError):
+            _repair_json('{"entries": [{"entry_type": "article"')
+
+
+class RecoverEntriesTest(unittest.TestCase):
+    def setUp(self):
+        self.agent = BibFixAgent(api_key="test", use_cache=False)
+
+    def test_invalid_items_are_skipped(self):
+        text = '{"entries": [%s, {"entry_type": "book"}, %s' % (ENTRY_A, ENTRY_B)
+        by_key = self.agent._structured_by_key(types.SimpleNamespace(output_text=text))
+        self.assertEqual(sorted(by_key), ["a", "b"])
+
+    def test_reply_without_entries_list_raises(self):
+        with self.assertRaises(ValueError):
+            self.agent._recover_entries('{"items": []}')
+
+
+if __name__ == "__main__":
+    unittest.main()
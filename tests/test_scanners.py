@@ -0,0 +1,145 @@
+import unittest
+
+import bibtexparser
+
+from bibfixer.agent import (
+    _TITLE_RE,
+    _extract_title_author,
+    _fast_parse_header,
+    _field_value,
+    original_entry_texts,
+)
+
+
+def _texts(content):
+    return original_entry_texts(content, bibtexparser.loads(content).entries)
+
+
+class FieldValueTest(unittest.TestCase):
+    def test_nested_braces_are_kept(self):
+        text = "@article{a,\n  title = {Constitutional {AI}: {H}armlessness},\n}"
+        self.assertEqual(
+            _field_value(text, _TITLE_RE), "Constitutional {AI}: {H}armlessness"
+        )
+
+    def test_quoted_value_may_contain_braces(self):
+        text = '@article{a,\n  title = "A {"}Quoted{"} Title",\n}'
+        self.assertEqual(_field_value(text, _TITLE_RE), 'A {"}Quoted{"} Title')
+
+    def test_similar_field_names_do_not_match(self):
+        text = (
+            "@inproceedings{a,\n  shorttitle = {Short},\n"
+            "  booktitle = {Proc.},\n  title = {Full}\n}"
+        )
+        self.assertEqual(_field_value(text, _TITLE_RE), "Full")
+
+    def test_missing_or_undelimited_value_is_empty(self):
+        self.assertEqual(_field_value("@misc{a,\n  note = {x}\n}", _TITLE_RE), "")
+        self.assertEqual(_field_value("@misc{a,\n  title = macro\n}", _TITLE_RE), "")
+        self.assertEqual(_field_value("@misc{a,\n  title = {Unclosed", _TITLE_RE), "")
+
+
+class ExtractTitleAuthorTest(unittest.TestCase):
+    def test_title_and_first_author(self):
+        text = (
+            "@article{a,\n  title = {{Machine   Learning}\n   from Weak Supervision},\n"
+            "  author = {Sugiyama, Masashi and Bao, Han},\n}"
+        )
+        # Only the " and " separator is split on when there are several authors
+        self.assertEqual(
+            _extract_title_author(text),
+            ("Machine Learning} from Weak Supervision", "Sugiyama, Masashi"),
+        )
+
+    def test_first_name_first_and_lookbehind(self):
+        text = (
+            "@incollection{a,\n  bookauthor = {Editor, Ed},\n"
+            "  author = {Akbir Khan and John Hughes},\n  title = {Debating}\n}"
+        )
+        self.assertEqual(_extract_title_author(text), ("Debating", "Akbir Khan"))
+
+
+class FastParseHeaderTest(unittest.TestCase):
+    def test_plain_header(self):
+        self.assertEqual(
+            _fast_parse_header("@article{bai2022,\n  title={x}\n}"),
+            ("article", "bai2022"),
+        )
+
+    def test_spaces_around_header_parts(self):
+        self.assertEqual(
+            _fast_parse_header("\n  @Article { bai2022 ,\n  title={x}\n}"),
+            ("Article", "bai2022"),
+        )
+
+    def test_parenthesized_header(self):
+        self.assertEqual(
+            _fast_parse_header("@inproceedings(khan2024,\n  title={x}\n)"),
+            ("inproceedings", "khan2024"),
+        )
+
+    def test_entry_without_fields(self):
+        self.assertEqual(_fast_parse_header("@misc{key}"), ("misc", "key"))
+
+    def test_not_a_header(self):
+        self.assertIsNone(_fast_parse_header("title = {x}"))
+        self.assertIsNone(_fast_parse_header("@{key,\n}"))
+        self.assertIsNone(_fast_parse_header("@bad type{key,\n}"))
+
+
+class OriginalEntryTextsTest(unittest.TestCase):
+    def test_entries_are_passed_on_verbatim(self):
+        content = (
+            "@article{a,\n  title = {A},\n  year = 2020\n}\n\n"
+            "@book(b,\n  title = {B}\n)\n"
+        )
+        self.assertEqual(
+            _texts(content),
+            [
+                "@article{a,\n  title = {A},\n  year = 2020\n}\n",
+                "@book(b,\n  title = {B}\n)\n",
+            ],
+        )
+
+    def test_comment_and_string_blocks_are_skipped(self):
+        content = (
+            "@comment{generated by a tool}\n"
+            '@string{conf = "Conference"}\n'
+            "@article{a,\n  title = {A}\n}\n"
+        )
+        self.assertEqual(_texts(content), ["@article{a,\n  title = {A}\n}\n"])
+
+    def test_duplicate_keys_keep_their_own_text(self):
+        content = (
+            "@article{dup,\n  title = {First}\n}\n"
+            "@article{dup,\n  title = {Second}\n}\n"
+        )
+        texts = _texts(content)
+        self.assertEqual(len(texts), 2)
+        self.assertIn("First", texts[0])
+        self.assertIn("Second", texts[1])
+
+    def test_entries_using_macros_are_expanded(self):
+        content = (
+            '@string{jmlr = "Journal of Machine Learning Research"}\n'
+            "@article{a,\n  title = {A},\n  journal = jmlr\n}\n"
+            "@inproceedings{b,\n  title = {B},\n  booktitle = jmlr # { Workshop}\n}\n"
+            "@article{c,\n  title = {About jmlr},\n  journal = {JMLR}\n}\n"
+        )
+        texts = _texts(content)
+        self.assertIn("{Journal of Machine Learning Research}", texts[0])
+        self.assertIn("{Journal of Machine Learning Research Workshop}", texts[1])
+        # A macro name inside a braced value is just text
+        self.assertEqual(
+            texts[2], "@article{c,\n  title = {About jmlr},\n  journal = {JMLR}\n}\n"
+        )
+
+    def test_unmatched_entry_is_reserialized(self):
+        entry = {"ENTRYTYPE": "misc", "ID": "other", "title": "Elsewhere"}
+        [text] = original_entry_texts("", [entry])
+        self.assertTrue(text.startswith("@misc{other,"))
+        self.assertIn("Elsewhere", text)
+
+
+if __name__ == "__main__":
+    unittest.main()